@@ -0,0 +1,91 @@
+"""
+Compares the in-process DictBackend with the SharedMemoryBackend when the
+same cached function is called from several worker processes.
+
+    python decorators/bench_caching_with_ttl.py [workers] [calls] [keys]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import contextlib
+import multiprocessing as mp
+
+from caching_with_ttl import CacheWithTTL, DictBackend, SharedMemoryBackend
+
+BACKEND_LATENCY = 0.002  # simulated cost of the real lookup
+
+
+def make_backend(kind, path):
+    if kind == "dict":
+        return DictBackend()
+    return SharedMemoryBackend(path)
+
+
+def worker(kind, path, calls, keys, seed, backend_calls, elapsed):
+    backend = make_backend(kind, path)
+
+    @CacheWithTTL(ttl_seconds=60, backend=backend)
+    def fetch(key):
+        with backend_calls.get_lock():
+            backend_calls.value += 1
+        time.sleep(BACKEND_LATENCY)
+        return {"id": key, "payload": "x" * 64}
+
+    rng = random.Random(seed)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fetch(rng.randrange(keys))
+        elapsed.value = time.perf_counter() - start
+
+
+def run(kind, workers, calls, keys, path):
+    backend_calls = mp.Value("l", 0)
+    elapsed = [mp.Value("d", 0.0) for _ in range(workers)]
+    processes = [
+        mp.Process(
+            target=worker,
+            args=(kind, path, calls, keys, seed, backend_calls, elapsed[seed]),
+        )
+        for seed in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return backend_calls.value, max(e.value for e in elapsed)
+
+
+def hit_latency(kind, path, rounds=100_000):
+    cache = CacheWithTTL(ttl_seconds=60, backend=make_backend(kind, path))
+    fetch = cache(lambda key: {"id": key, "payload": "x" * 64})
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fetch(1)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fetch(1)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    keys = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    print(f"{workers} workers x {calls} calls over {keys} keys")
+    print(f"{'backend':<8} {'hit latency':>12} {'backend calls':>14} {'wall':>8}")
+    for kind in ("dict", "shared"):
+        with tempfile.TemporaryDirectory() as tmp:
+            latency = hit_latency(kind, os.path.join(tmp, "latency.bin"))
+            path = os.path.join(tmp, "cache.bin")
+            total_calls, wall = run(kind, workers, calls, keys, path)
+        print(
+            f"{kind:<8} {latency * 1e6:>10.2f}us {total_calls:>14} {wall:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
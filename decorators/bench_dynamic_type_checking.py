@@ -0,0 +1,50 @@
+"""
+Per-call overhead of validate_and_coerce compared with calling the function
+directly.
+
+    python decorators/bench_dynamic_type_checking.py [calls]
+"""
+
+import sys
+import timeit
+from typing import List, Optional
+
+from dynamic_type_checking import validate_and_coerce
+
+
+def scalar(user_id: int, ratio: float, name: str = "x"):
+    return user_id
+
+
+def container(user_id: int, scores: List[int], parent: Optional[int] = None):
+    return user_id
+
+
+CASES = {
+    "scalars, already typed": (scalar, (1, 0.5), {"name": "y"}),
+    "scalars, needs coercion": (scalar, ("1", "0.5"), {"name": "y"}),
+    "List[int], already typed": (container, (1, [1, 2, 3]), {"parent": 2}),
+    "List[int], needs coercion": (container, ("1", ["1", "2", "3"]), {}),
+}
+
+
+def best_of(stmt, calls, repeat=5):
+    return min(timeit.repeat(stmt, number=calls, repeat=repeat))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print(f"{'case':<28} {'unwrapped':>10} {'wrapped':>10} {'overhead':>10}")
+    for name, (func, args, kwargs) in CASES.items():
+        wrapped = validate_and_coerce(func)
+        plain = best_of(lambda: func(*args, **kwargs), calls)
+        checked = best_of(lambda: wrapped(*args, **kwargs), calls)
+        print(
+            f"{name:<28} {plain / calls * 1e9:>8.0f}ns {checked / calls * 1e9:>8.0f}ns"
+            f" {(checked - plain) / calls * 1e9:>8.0f}ns"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Throughput of the rate limiters when many threads call through them at once.
+
+The limits are set high enough that nobody is throttled, so the numbers show
+the bookkeeping overhead and lock contention of each algorithm.
+
+    python decorators/bench_rate_limit.py [threads] [calls per thread]
+"""
+
+import sys
+import time
+import threading
+
+from rate_limit import RateLimiter, TokenBucket, SlidingWindowCounter
+
+UNLIMITED = 10**9
+
+
+def hammer(target, threads, calls):
+    barrier = threading.Barrier(threads + 1)
+
+    def run(thread_id):
+        barrier.wait()
+        for i in range(calls):
+            target(thread_id, i)
+
+    workers = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return threads * calls / (time.perf_counter() - start)
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+    deque_limiter = RateLimiter(UNLIMITED, 60)
+    token_bucket = TokenBucket(UNLIMITED)
+    sliding_window = SlidingWindowCounter(UNLIMITED, 60)
+    keyed_bucket = TokenBucket(UNLIMITED)
+
+    cases = {
+        "RateLimiter (deque)": deque_limiter(lambda t, i: None),
+        "TokenBucket": token_bucket(lambda t, i: None),
+        "SlidingWindowCounter": sliding_window(lambda t, i: None),
+        "TokenBucket.try_acquire": lambda t, i: token_bucket.try_acquire(),
+        "keyed try_acquire (1k keys)": lambda t, i: keyed_bucket.try_acquire(
+            (t * calls + i) % 1000
+        ),
+    }
+
+    print(f"{threads} threads x {calls} calls")
+    for name, target in cases.items():
+        throughput = hammer(target, threads, calls)
+        print(f"{name:<30} {throughput:>12,.0f} calls/s")
+
+    print(f"\ntimestamps held by RateLimiter: {len(deque_limiter.call_timestamps)}")
+    print(f"states held by keyed TokenBucket: {len(keyed_bucket.state)}")
+
+
+if __name__ == "__main__":
+    main()
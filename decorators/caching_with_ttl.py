@@ -1,94 +1,331 @@
+import os
+import mmap
 import time
-from functools import wraps
+import struct
+import pickle
+import hashlib
 import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import partial, wraps
+from typing import Any, Tuple
 
+try:
+    import fcntl
+except ImportError:  # not available on windows
+    fcntl = None
 
-class CacheWithTTL:
-    def __init__(self, ttl_seconds: int = 300):
-        self.ttl_seconds = ttl_seconds
+_PICKLE_ERRORS = (pickle.PicklingError, TypeError, AttributeError)
+
+
+class CacheBackend(ABC):
+    """Storage used by CacheWithTTL. Entries expire at an absolute wall-clock time."""
+
+    @abstractmethod
+    def get(self, key: Any) -> Tuple[bool, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: Any, value: Any, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: Any) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class DictBackend(CacheBackend):
+    """In-process dict, private to every worker process."""
+
+    def __init__(self):
         self.cache = {}
         self.lock = threading.Lock()
 
+    def get(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return False, None
+            result, expires_at = entry
+            if time.time() < expires_at:
+                return True, result
+            del self.cache[key]
+            return False, None
+
+    def set(self, key, value, ttl_seconds):
+        with self.lock:
+            self.cache[key] = (value, time.time() + ttl_seconds)
+
+    def delete(self, key):
+        with self.lock:
+            return self.cache.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    Hash table in an mmap'd file that every local process opening the same
+    path shares.
+
+    The table is set-associative: a key hashes to a window of `ways` fixed
+    size slots and lives in any of them, so a delete only has to zero its
+    slot. When a window is full the entry closest to expiry is evicted.
+    Keys and values are pickled; values that are larger than a slot or that
+    cannot be pickled are not cached. Functions sharing a file share one key
+    space, which CacheWithTTL keeps apart by putting the function in the key,
+    and clear() empties the file for all of them.
+    Processes are serialised with flock, threads with a regular lock.
+    """
+
+    _MAGIC = b"TTLCACH1"
+    _FILE_HEADER = struct.Struct("<8sII")
+    _SLOT_HEADER = struct.Struct("<16sdI")
+    _EMPTY = bytes(16)
+
+    def __init__(
+        self, path: str, slots: int = 4096, slot_size: int = 1024, ways: int = 8
+    ):
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryBackend needs fcntl (POSIX only)")
+        if slot_size <= self._SLOT_HEADER.size:
+            raise ValueError(f"slot size must exceed {self._SLOT_HEADER.size} bytes")
+        if slots <= 0 or not 0 < ways <= slots:
+            raise ValueError("slots and ways must be positive and ways <= slots")
+
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ways = ways
+        self.max_value_size = slot_size - self._SLOT_HEADER.size
+        self._pid = None
+        self._reopen_lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        # flock is tied to the open file description, which a forked child
+        # would share with its parent, so each process opens its own.
+        if self._pid is not None:
+            # drop the copies inherited from the parent; this does not
+            # release the parent's flock, which it still holds its own fd for
+            self._mm.close()
+            os.close(self._fd)
+        self.lock = threading.Lock()
+        size = self._FILE_HEADER.size + self.slots * self.slot_size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+                header = self._FILE_HEADER.pack(self._MAGIC, self.slots, self.slot_size)
+                os.pwrite(fd, header, 0)
+            header = os.pread(fd, self._FILE_HEADER.size, 0)
+            if os.fstat(fd).st_size != size or header != self._FILE_HEADER.pack(
+                self._MAGIC, self.slots, self.slot_size
+            ):
+                raise ValueError(f"{self.path} holds a cache with a different layout")
+            self._mm = mmap.mmap(fd, size)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _locked(self, operation):
+        if self._pid != os.getpid():
+            with self._reopen_lock:
+                if self._pid != os.getpid():
+                    self._open()
+        with self.lock:
+            fcntl.flock(self._fd, operation)
+            try:
+                yield self._mm
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _window(self, key):
+        digest = hashlib.blake2b(
+            pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16
+        ).digest()
+        if digest == self._EMPTY:
+            digest = b"\x01" + digest[1:]
+        start = int.from_bytes(digest[:8], "little") % self.slots
+        offsets = [
+            self._FILE_HEADER.size + ((start + i) % self.slots) * self.slot_size
+            for i in range(self.ways)
+        ]
+        return digest, offsets
+
+    def get(self, key):
+        try:
+            digest, offsets = self._window(key)
+        except _PICKLE_ERRORS:
+            return False, None
+        now = time.time()
+        with self._locked(fcntl.LOCK_SH) as mm:
+            for offset in offsets:
+                slot_digest, expires_at, length = self._SLOT_HEADER.unpack_from(
+                    mm, offset
+                )
+                if slot_digest == digest:
+                    if now >= expires_at:
+                        return False, None
+                    start = offset + self._SLOT_HEADER.size
+                    payload = mm[start : start + length]
+                    break
+            else:
+                return False, None
+        return True, pickle.loads(payload)
+
+    def set(self, key, value, ttl_seconds):
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            digest, offsets = self._window(key)
+        except _PICKLE_ERRORS:
+            return
+        if len(payload) > self.max_value_size:
+            return
+        now = time.time()
+        with self._locked(fcntl.LOCK_EX) as mm:
+            target = None
+            oldest = None
+            for offset in offsets:
+                slot_digest, expires_at, _ = self._SLOT_HEADER.unpack_from(mm, offset)
+                if slot_digest == digest:
+                    target = offset
+                    break
+                if target is None and (slot_digest == self._EMPTY or now >= expires_at):
+                    target = offset
+                if oldest is None or expires_at < oldest[0]:
+                    oldest = (expires_at, offset)
+            if target is None:
+                target = oldest[1]
+            self._SLOT_HEADER.pack_into(
+                mm, target, digest, now + ttl_seconds, len(payload)
+            )
+            start = target + self._SLOT_HEADER.size
+            mm[start : start + len(payload)] = payload
+
+    def delete(self, key):
+        try:
+            digest, offsets = self._window(key)
+        except _PICKLE_ERRORS:
+            return False
+        with self._locked(fcntl.LOCK_EX) as mm:
+            for offset in offsets:
+                if mm[offset : offset + 16] == digest:
+                    self._SLOT_HEADER.pack_into(mm, offset, self._EMPTY, 0.0, 0)
+                    return True
+        return False
+
+    def clear(self):
+        with self._locked(fcntl.LOCK_EX) as mm:
+            start = self._FILE_HEADER.size
+            mm[start:] = bytes(len(mm) - start)
+
+    def close(self):
+        if self._pid == os.getpid():
+            self._mm.close()
+            os.close(self._fd)
+        self._pid = None
+
+
+class CacheWithTTL:
+    def __init__(self, ttl_seconds: int = 300, backend: CacheBackend = None):
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend if backend is not None else DictBackend()
+
+    @staticmethod
+    def make_key(func, args, kwargs):
+        # the function is part of the key because a shared backend may hold
+        # entries for several functions; kwargs are sorted rather than a
+        # frozenset so the key pickles identically in every process
+        kwargs = tuple(sorted(kwargs.items()))
+        return (func.__module__, func.__qualname__, args, kwargs)
+
     def __call__(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            key = (args, frozenset(kwargs.items()))
-            with self.lock:
-                if key in self.cache:
-                    result, timestamp = self.cache[key]
-                    if time.time() - timestamp < self.ttl_seconds:
-                        return result
-                    else:
-                        self.cache.pop()
-
-                print(f"cache miss for {func.__name__} with key {key}")
-                result = func(*args, **kwargs)
-                self.cache[key] = (result, time.time())
+            key = self.make_key(func, args, kwargs)
+            hit, result = self.backend.get(key)
+            if hit:
                 return result
 
+            print(f"cache miss for {func.__name__} with key {key}")
+            result = func(*args, **kwargs)
+            self.backend.set(key, result, self.ttl_seconds)
+            return result
+
         wrapper.cache_clear = self.clear_cache
-        wrapper.cache_invalidate = lambda *args, **kwargs: self.invaildate_key(
-            *args, **kwargs
-        )
+        wrapper.cache_invalidate = partial(self.invalidate_key, func)
         return wrapper
 
     def clear_cache(self):
-        with self.lock:
-            self.cache.clear()
-
-    def invalidate_key(self, args, **kwargs):
-        key = (args, frozenset(kwargs.items()))
-        with self.lock:
-            if key in self.cache:
-                print(f"Invalidating cache for key {key}")
-                self.cache.pop(key)
-            else:
-                print(f"key {key} not found in cache")
+        """
+        Empties the whole backend. With a SharedMemoryBackend that drops the
+        entries of every function cached in the same file, in every process.
+        """
+        self.backend.clear()
 
+    def invalidate_key(self, func, *args, **kwargs):
+        key = self.make_key(func, args, kwargs)
+        if self.backend.delete(key):
+            print(f"Invalidating cache for key {key}")
+        else:
+            print(f"key {key} not found in cache")
 
-@CacheWithTTL(ttl_seconds=10)  # Cache results for 10 seconds
-def get_user_data(user_id, fetch_details=False):
-    """Simulates a slow database query."""
-    print(
-        f"--- Fetching user data for {user_id} (details: {fetch_details})... (simulating 2s delay)"
-    )
-    time.sleep(2)  # Simulate network/DB latency
-    return {
-        "id": user_id,
-        "name": f"User {user_id}",
-        "details": "..." if fetch_details else "summary",
-    }
 
+if __name__ == "__main__":
+    @CacheWithTTL(ttl_seconds=10)  # Cache results for 10 seconds
+    def get_user_data(user_id, fetch_details=False):
+        """Simulates a slow database query."""
+        print(
+            f"--- Fetching user data for {user_id} (details: {fetch_details})... (simulating 2s delay)"
+        )
+        time.sleep(2)  # Simulate network/DB latency
+        return {
+            "id": user_id,
+            "name": f"User {user_id}",
+            "details": "..." if fetch_details else "summary",
+        }
 
-print("--- Initial calls ---")
-print(get_user_data(1))
-print(get_user_data(2, fetch_details=True))
-print(get_user_data(1))  # Should be a cache hit
+    print("--- Initial calls ---")
+    print(get_user_data(1))
+    print(get_user_data(2, fetch_details=True))
+    print(get_user_data(1))  # Should be a cache hit
 
-print("\n--- Waiting 5 seconds (still cached) ---")
-time.sleep(5)
-print(get_user_data(1))  # Should still be a cache hit
+    print("\n--- Waiting 5 seconds (still cached) ---")
+    time.sleep(5)
+    print(get_user_data(1))  # Should still be a cache hit
 
-print("\n--- Waiting another 6 seconds (cache expired) ---")
-time.sleep(6)  # Total 11 seconds elapsed
-print(get_user_data(1))  # Should re-compute
+    print("\n--- Waiting another 6 seconds (cache expired) ---")
+    time.sleep(6)  # Total 11 seconds elapsed
+    print(get_user_data(1))  # Should re-compute
 
-print("\n--- Testing manual invalidation ---")
-print(get_user_data(3))  # New call, will compute and cache
-print(get_user_data(3))  # Cache hit
+    print("\n--- Testing manual invalidation ---")
+    print(get_user_data(3))  # New call, will compute and cache
+    print(get_user_data(3))  # Cache hit
 
-print("Clearing cache for get_user_data...")
-get_user_data.cache_clear()  # Call the added method
+    print("Clearing cache for get_user_data...")
+    get_user_data.cache_clear()  # Call the added method
 
-print(get_user_data(3))  # Should re-compute after clear
+    print(get_user_data(3))  # Should re-compute after clear
 
-print("\n--- Testing specific key invalidation ---")
-print(get_user_data(4, fetch_details=True))  # Compute and cache
-print(get_user_data(4, fetch_details=True))  # Cache hit
+    print("\n--- Testing specific key invalidation ---")
+    print(get_user_data(4, fetch_details=True))  # Compute and cache
+    print(get_user_data(4, fetch_details=True))  # Cache hit
 
-print("Invalidating cache for user 4 with details=True...")
-get_user_data.cache_invalidate(4, fetch_details=True)
+    print("Invalidating cache for user 4 with details=True...")
+    get_user_data.cache_invalidate(4, fetch_details=True)
 
-print(get_user_data(4, fetch_details=True))  # Should re-compute
+    print(get_user_data(4, fetch_details=True))  # Should re-compute
 
-print("\n--- Done ---")
+    print("\n--- Done ---")
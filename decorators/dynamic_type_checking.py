@@ -1,92 +1,281 @@
+import types
 import inspect
+import itertools
 from functools import wraps
-from typing import get_type_hints, Any, List, Union
+from typing import get_type_hints, get_origin, get_args, Any, List, Union
 
+_POSITIONAL = (
+    inspect.Parameter.POSITIONAL_ONLY,
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+)
+_UNION_TYPES = (Union, getattr(types, "UnionType", Union))
 
-def _coerce_value(value: Any, target_type: Any) -> Any:
-    origin = getattr(target_type, "__origin__", None)
+
+def _coercion_error(value: Any, target_type: Any) -> TypeError:
+    return TypeError(
+        f"could not coerce {value!r} of {type(value).__name__} to {target_type}"
+    )
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _coerce_each(items, coercers):
+    """
+    Coerces `items` pairwise with `coercers`. Returns None if every item came
+    back unchanged, so callers can keep the original container.
+    """
+    coerced = None
+    for index, (coerce, item) in enumerate(zip(coercers, items)):
+        new_item = coerce(item)
+        if coerced is not None:
+            coerced.append(new_item)
+        elif new_item is not item:
+            coerced = list(itertools.islice(items, index))
+            coerced.append(new_item)
+    return coerced
+
+
+def _build_coercer(target_type: Any):
+    """
+    Compiles a type hint into a closure that returns the value unchanged if
+    it already has the right type and coerces it otherwise. Returns None for
+    hints that accept anything.
+    """
+    if target_type is Any:
+        return None
+
+    origin = get_origin(target_type)
+    args = get_args(target_type)
+
+    # handle union types like Union[int, str]
+    if origin in _UNION_TYPES:
+        member_coercers = [_build_coercer(arg) for arg in args]
+        if None in member_coercers:
+            return None
+        exact_types = tuple(arg for arg in args if isinstance(arg, type))
+
+        def coerce_union(value):
+            if isinstance(value, exact_types):
+                return value
+            for coerce in member_coercers:
+                try:
+                    return coerce(value)
+                except (TypeError, ValueError):
+                    continue
+            raise _coercion_error(value, target_type)
+
+        return coerce_union
 
     # handle generic containers like list[int]
-    if origin is list and hasattr(target_type, "__args__", False):
-        item_type = target_type.__args__[0]
-        if isinstance(value, list):
-            return [_coerce_value(item, item_type) for item in value]
-
-    # handle union types life Union[int, str]
-    if origin is Union:
-        for possible_type in target_type.__args__:
-            try:
-                return _coerce_value(value, possible_type)
-            except (TypeError, ValueError):
-                continue
+    if origin in (list, set, frozenset) or (
+        origin is tuple and len(args) == 2 and args[1] is Ellipsis
+    ):
+        item_coercer = _build_coercer(args[0]) if args else None
+
+        def coerce_items(value):
+            if not isinstance(value, origin):
+                raise _coercion_error(value, target_type)
+            if item_coercer is None:
+                return value
+            coerced = _coerce_each(value, itertools.repeat(item_coercer))
+            return value if coerced is None else origin(coerced)
+
+        return coerce_items
+
+    if origin is tuple:
+        item_coercers = [_build_coercer(arg) or _identity for arg in args]
+
+        def coerce_tuple(value):
+            if not isinstance(value, tuple) or len(value) != len(item_coercers):
+                raise _coercion_error(value, target_type)
+            coerced = _coerce_each(value, item_coercers)
+            return value if coerced is None else tuple(coerced)
+
+        return coerce_tuple
+
+    if origin is dict:
+        key_coercer, value_coercer = (
+            [_build_coercer(arg) or _identity for arg in args]
+            if args
+            else (None, None)
+        )
+
+        def coerce_dict(value):
+            if not isinstance(value, dict):
+                raise _coercion_error(value, target_type)
+            if key_coercer is None:
+                return value
+            coerced = None
+            for index, (key, item) in enumerate(value.items()):
+                new_key, new_item = key_coercer(key), value_coercer(item)
+                if coerced is not None:
+                    coerced[new_key] = new_item
+                elif new_key is not key or new_item is not item:
+                    coerced = dict(itertools.islice(value.items(), index))
+                    coerced[new_key] = new_item
+            return value if coerced is None else coerced
+
+        return coerce_dict
+
+    if origin is not None:
+        # other subscripted generics: only the container type can be checked
+        if not isinstance(origin, type):
+            return None
+        target_type = origin
+
+    if not isinstance(target_type, type):
+        return None
 
     # base case: attempt direct coercion
-    try:
-        return target_type(value)
-    except (TypeError, ValueError) as e:
-        raise TypeError(
-            f"could not coerce {value!r} of {type(value).__name__} to {target_type}"
-        ) from e
+    def coerce_value(value):
+        if isinstance(value, target_type):
+            return value
+        try:
+            return target_type(value)
+        except (TypeError, ValueError) as e:
+            raise _coercion_error(value, target_type) from e
+
+    return coerce_value
 
 
 def validate_and_coerce(func):
     """
     Decorator that validates and coerces function arguments based on type hints.
+
+    The signature is turned into a coercion plan once, at decoration time, so
+    a call only runs the precompiled coercer of each annotated argument.
     """
     sig = inspect.signature(func)
     type_hints = get_type_hints(func)
 
+    positional_plan = []  # (index, name, coercer) for annotated positional params
+    keyword_plan = {}  # name -> coercer for params that can be passed by keyword
+    # defaults are coerced on each call that omits them, so a coerced
+    # mutable default is a fresh object every time, as with apply_defaults
+    keyword_defaults = []  # (index, name, default, coercer) for annotated defaults
+    # positional-only defaults cannot be passed by keyword, so when one needs
+    # coercion the positional args are padded with them up to that index
+    positional_only_defaults = {}  # index -> (name, default, coercer or None)
+    pad_positional_to = 0
+    var_positional = var_keyword = None
+    var_positional_name = None
+    n_positional = 0
+
+    for param in sig.parameters.values():
+        coercer = _build_coercer(type_hints.get(param.name, Any))
+        if param.kind is inspect.Parameter.VAR_POSITIONAL:
+            var_positional = coercer
+            var_positional_name = param.name
+            continue
+        if param.kind is inspect.Parameter.VAR_KEYWORD:
+            var_keyword = coercer
+            continue
+
+        index = n_positional if param.kind in _POSITIONAL else float("inf")
+        if param.kind in _POSITIONAL:
+            n_positional += 1
+            if coercer is not None:
+                positional_plan.append((index, param.name, coercer))
+        if param.kind is not inspect.Parameter.POSITIONAL_ONLY:
+            keyword_plan[param.name] = coercer
+
+        if param.default is inspect.Parameter.empty:
+            continue
+        if param.default is None:
+            # e.g. `limit: int = None`, leave the sentinel to the function
+            coercer = None
+        if param.kind is inspect.Parameter.POSITIONAL_ONLY:
+            positional_only_defaults[index] = (param.name, param.default, coercer)
+            if coercer is not None:
+                pad_positional_to = index + 1
+        elif coercer is not None:
+            keyword_defaults.append((index, param.name, param.default, coercer))
+
+    first_positional_only_default = min(positional_only_defaults, default=0)
+
+    def _fail(name, error):
+        return TypeError(f"Argument {name} failed validation {error}")
+
+    def _coerce_default(name, default, coerce):
+        try:
+            return coerce(default)
+        except TypeError as e:
+            raise _fail(name, e)
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        bound_args = sig.bind(*args, **kwargs)
-        bound_args.apply_defaults()
-
-        coerced_args = {}
-        for name, value in bound_args.arguments.items():
-            if name in type_hints:
-                target_type = type_hints[name]
-                if not isinstance(value, target_type):
+        if positional_plan or var_positional:
+            args = list(args)
+            n_args = len(args)
+            for index, name, coerce in positional_plan:
+                if index >= n_args:
+                    break
+                try:
+                    args[index] = coerce(args[index])
+                except TypeError as e:
+                    raise _fail(name, e)
+            if var_positional:
+                for index in range(n_positional, n_args):
                     try:
-                        coerced_value = _coerce_value(value, target_type)
-                        coerced_args[name] = coerced_value
+                        args[index] = var_positional(args[index])
                     except TypeError as e:
-                        raise TypeError(f"Argument {name} failed validation {e}")
-                else:
-                    coerced_args[name] = value  # already of correct type
-            else:
-                coerced_args[name] = value
+                        raise _fail(var_positional_name, e)
+
+        for name, value in kwargs.items():
+            coerce = keyword_plan.get(name, var_keyword)
+            if coerce is not None:
+                try:
+                    kwargs[name] = coerce(value)
+                except TypeError as e:
+                    raise _fail(name, e)
+
+        if first_positional_only_default <= len(args) < pad_positional_to:
+            args = [*args]
+            for index in range(len(args), pad_positional_to):
+                name, default, coerce = positional_only_defaults[index]
+                if coerce is not None:
+                    default = _coerce_default(name, default, coerce)
+                args.append(default)
 
-        return func(**coerced_args)
+        for index, name, default, coerce in keyword_defaults:
+            if index >= len(args) and name not in kwargs:
+                value = _coerce_default(name, default, coerce)
+                if value is not default:
+                    kwargs[name] = value
+
+        return func(*args, **kwargs)
 
     return wrapper
 
 
-@validate_and_coerce
-def process_user_data(
-    user_id: int, scores: List[int], metadata: dict, is_active: bool = True
-):
-    """Processes user data with strict type requirements."""
-    print(f"Processing user ID: {user_id} (type: {type(user_id).__name__})")
-    print(f"Scores: {scores} (item types: {[type(s).__name__ for s in scores]})")
-    print(f"Is Active: {is_active} (type: {type(is_active).__name__})")
-    return {"status": "processed", "id": user_id}
-
-
-# Simulating data received from a JSON API (where everything might be a string)
-api_data = {
-    "user_id": "12345",
-    "scores": ["100", "88", "95"],
-    "metadata": {"source": "web"},
-    "is_active": "false",  # Note: our coercer doesn't handle bool strings, so this will fail.
-}
-
-# This will work
-print("--- Successful Call ---")
-process_user_data(user_id="987", scores=[99.0, "85"], metadata={})
-
-# This will raise a TypeError because "false" cannot be directly coerced to bool
-print("\n--- Failing Call ---")
-try:
-    process_user_data(**api_data)
-except TypeError as e:
-    print(f"ERROR: {e}")
+if __name__ == "__main__":
+    @validate_and_coerce
+    def process_user_data(
+        user_id: int, scores: List[int], metadata: dict, is_active: bool = True
+    ):
+        """Processes user data with strict type requirements."""
+        print(f"Processing user ID: {user_id} (type: {type(user_id).__name__})")
+        print(f"Scores: {scores} (item types: {[type(s).__name__ for s in scores]})")
+        print(f"Is Active: {is_active} (type: {type(is_active).__name__})")
+        return {"status": "processed", "id": user_id}
+
+    # Simulating data received from a JSON API (where everything might be a string)
+    api_data = {
+        "user_id": "12345",
+        "scores": ["100", "88", "95"],
+        "metadata": {"source": "web"},
+        "is_active": "false",  # Note: our coercer doesn't handle bool strings, so this will fail.
+    }
+
+    # This will work
+    print("--- Successful Call ---")
+    process_user_data(user_id="987", scores=[99.0, "85"], metadata={})
+
+    # This will raise a TypeError because "false" cannot be directly coerced to bool
+    print("\n--- Failing Call ---")
+    try:
+        process_user_data(**api_data)
+    except TypeError as e:
+        print(f"ERROR: {e}")
@@ -1,6 +1,10 @@
 import time
+import math
+import asyncio
+import inspect
 import collections
 import threading
+from abc import ABC, abstractmethod
 from functools import wraps
 
 
@@ -13,7 +17,7 @@ class RateLimiter:
             calls_per_period: The maximum number of calls allowed within the period.
             period_seconds: The time window in seconds.
         """
-        if calls_per_period <= 0 and period_seconds <= 0:
+        if calls_per_period <= 0 or period_seconds <= 0:
             raise ValueError("calls per period a period seconds must be positive")
 
         self.call_per_period = calls_per_period
@@ -24,27 +28,205 @@ class RateLimiter:
     def __call__(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            with self.lock:
-                current_time = time.time()
+            while True:
+                with self.lock:
+                    current_time = time.time()
 
-                # remove old time stamp
-                while (
-                    self.call_timestamps
-                    and self.call_timestamps[0] <= current_time - self.period_seconds
-                ):
-                    self.call_timestamps.popleft()
+                    # remove old time stamp
+                    while (
+                        self.call_timestamps
+                        and self.call_timestamps[0]
+                        <= current_time - self.period_seconds
+                    ):
+                        self.call_timestamps.popleft()
+
+                    if len(self.call_timestamps) < self.call_per_period:
+                        self.call_timestamps.append(current_time)
+                        break
 
-                if len(self.call_timestamps) >= self.call_per_period:
                     time_to_wait = self.period_seconds - (
                         current_time - self.call_timestamps[0]
                     )
-                    if time_to_wait > 0:
-                        print(f"Rate limit hit. waiting for {time_to_wait}")
-                        time.sleep(time_to_wait)
-                        current_time = time.time()
 
-                self.call_timestamps.append(current_time)
+                # sleep without the lock so other threads are not stalled
+                print(f"Rate limit hit. waiting for {time_to_wait}")
+                time.sleep(max(time_to_wait, 0))
 
-            return func(*args, *kwargs)
+            return func(*args, **kwargs)
 
         return wrapper
+
+
+class _KeyedLimiter(ABC):
+    """
+    Base for the O(1)-memory limiters. Each key (user, tenant, ...) keeps a
+    small fixed-size state list; the lock is only held while that state is
+    updated, never while waiting.
+    """
+
+    def __init__(self, key_func=None):
+        self.key_func = key_func
+        self.state = {}
+        self.lock = threading.Lock()
+        self._sweep_at = 1024
+
+    @abstractmethod
+    def _new_state(self, now: float) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _reserve(self, state: list, now: float) -> float:
+        """Take a permit and return 0, or return the seconds until one frees up."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _is_idle(self, state: list, now: float) -> bool:
+        raise NotImplementedError
+
+    def _time_to_wait(self, key) -> float:
+        now = time.monotonic()
+        with self.lock:
+            state = self.state.get(key)
+            if state is None:
+                if len(self.state) >= self._sweep_at:
+                    self._sweep(now)
+                state = self.state[key] = self._new_state(now)
+            return self._reserve(state, now)
+
+    def _sweep(self, now: float) -> None:
+        # idle keys behave exactly like fresh ones, so they can be dropped
+        for key in [k for k, s in self.state.items() if self._is_idle(s, now)]:
+            del self.state[key]
+        self._sweep_at = max(1024, 2 * len(self.state))
+
+    def try_acquire(self, key=None) -> bool:
+        """Takes a permit for `key` if one is available, without waiting."""
+        return self._time_to_wait(key) == 0
+
+    def wait(self, key=None) -> None:
+        """Blocks the calling thread until a permit for `key` is taken."""
+        while True:
+            time_to_wait = self._time_to_wait(key)
+            if time_to_wait == 0:
+                return
+            time.sleep(time_to_wait)
+
+    async def acquire(self, key=None) -> None:
+        """Waits for a permit for `key` without blocking the event loop."""
+        while True:
+            time_to_wait = self._time_to_wait(key)
+            if time_to_wait == 0:
+                return
+            await asyncio.sleep(time_to_wait)
+
+    def __call__(self, func):
+        key_func = self.key_func
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = key_func(*args, **kwargs) if key_func else None
+                await self.acquire(key)
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = key_func(*args, **kwargs) if key_func else None
+            self.wait(key)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+
+class TokenBucket(_KeyedLimiter):
+    def __init__(self, rate: float, capacity: float = None, key_func=None):
+        """
+        Token bucket limiter.
+
+        Args:
+            rate: Tokens added per second, i.e. the sustained calls per second.
+            capacity: The largest burst allowed. Defaults to `rate`, but at
+                least one call.
+            key_func: Optional callable taking the wrapped function's arguments
+                and returning the key (user, tenant, ...) to limit by.
+        """
+        capacity = max(1, rate) if capacity is None else capacity
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+
+        super().__init__(key_func)
+        self.rate = rate
+        self.capacity = capacity
+
+    def _new_state(self, now):
+        # [tokens, last refill time]
+        return [self.capacity, now]
+
+    def _reserve(self, state, now):
+        tokens = min(self.capacity, state[0] + (now - state[1]) * self.rate)
+        state[1] = now
+        if tokens >= 1:
+            state[0] = tokens - 1
+            return 0
+        state[0] = tokens
+        return (1 - tokens) / self.rate
+
+    def _is_idle(self, state, now):
+        return state[0] + (now - state[1]) * self.rate >= self.capacity
+
+
+class SlidingWindowCounter(_KeyedLimiter):
+    def __init__(self, calls_per_period: int, period_seconds: float, key_func=None):
+        """
+        Sliding window counter limiter. Approximates a sliding window by
+        weighting the previous fixed window's count by how much of it still
+        overlaps the sliding one.
+
+        Args:
+            calls_per_period: The maximum number of calls allowed within the period.
+            period_seconds: The time window in seconds.
+            key_func: Optional callable taking the wrapped function's arguments
+                and returning the key (user, tenant, ...) to limit by.
+        """
+        if calls_per_period <= 0 or period_seconds <= 0:
+            raise ValueError("calls per period a period seconds must be positive")
+
+        super().__init__(key_func)
+        self.calls_per_period = calls_per_period
+        self.period_seconds = period_seconds
+
+    def _new_state(self, now):
+        # [current window start, previous window count, current window count]
+        return [self._window_start(now), 0, 0]
+
+    def _window_start(self, now):
+        return math.floor(now / self.period_seconds) * self.period_seconds
+
+    def _roll(self, state, now):
+        window_start = self._window_start(now)
+        if window_start != state[0]:
+            adjacent = window_start - state[0] <= self.period_seconds * 1.5
+            state[1] = state[2] if adjacent else 0
+            state[2] = 0
+            state[0] = window_start
+
+    def _reserve(self, state, now):
+        self._roll(state, now)
+        window_start, previous, current = state
+        overlap = 1 - (now - window_start) / self.period_seconds
+        if previous * overlap + current < self.calls_per_period:
+            state[2] += 1
+            return 0
+
+        window_end = window_start + self.period_seconds
+        if current >= self.calls_per_period or previous == 0:
+            return max(window_end - now, 1e-6)
+        # wait until the previous window's weight has decayed enough
+        overlap_needed = (self.calls_per_period - current) / previous
+        return max(window_end - overlap_needed * self.period_seconds - now, 1e-6)
+
+    def _is_idle(self, state, now):
+        return now - state[0] >= 2 * self.period_seconds
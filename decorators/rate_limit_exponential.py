@@ -1,8 +1,154 @@
 import time
 import random
+import asyncio
+import inspect
+import threading
+import collections
 from functools import wraps
 
 
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class RetryBudget:
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_retries_per_second: float = 1.0,
+        window_seconds: int = 10,
+    ):
+        """
+        Caps retries at a fraction of the requests seen recently, shared by
+        every call that uses the same budget. During an outage callers stop
+        multiplying the load instead of each retrying independently.
+
+        Args:
+            ratio: Retries allowed per request in the window.
+            min_retries_per_second: Floor so low-traffic callers can still retry.
+            window_seconds: How far back requests and retries are counted.
+        """
+        if ratio < 0 or min_retries_per_second < 0 or window_seconds <= 0:
+            raise ValueError(
+                "ratio and floor must not be negative and window must be positive"
+            )
+
+        self.ratio = ratio
+        self.min_retries = min_retries_per_second * window_seconds
+        self.window_seconds = window_seconds
+        # one [second, requests, retries] bucket per second of the window
+        self.buckets = collections.deque()
+        self.requests = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def _bucket(self):
+        second = int(time.monotonic())
+        while self.buckets and self.buckets[0][0] <= second - self.window_seconds:
+            _, requests, retries = self.buckets.popleft()
+            self.requests -= requests
+            self.retries -= retries
+        if not self.buckets or self.buckets[-1][0] != second:
+            self.buckets.append([second, 0, 0])
+        return self.buckets[-1]
+
+    def record_request(self) -> None:
+        with self.lock:
+            self._bucket()[1] += 1
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Takes one retry from the budget if any is left."""
+        with self.lock:
+            bucket = self._bucket()
+            if self.retries >= max(self.min_retries, self.ratio * self.requests):
+                return False
+            bucket[2] += 1
+            self.retries += 1
+            return True
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        """
+        Stops calls to a failing dependency so they fail fast.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit.
+            recovery_timeout: Seconds to stay open before probing again.
+            half_open_max_calls: Probe calls let through while half open.
+        """
+        if failure_threshold <= 0 or recovery_timeout < 0 or half_open_max_calls <= 0:
+            raise ValueError("circuit breaker thresholds must be positive")
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_started_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probes = 0
+            if self.state == self.HALF_OPEN:
+                if self.probes >= self.half_open_max_calls:
+                    # a probe that never reported back must not wedge the
+                    # breaker, so probing resumes after another timeout
+                    if now - self.probe_started_at < self.recovery_timeout:
+                        return False
+                    self.probes = 0
+                self.probes += 1
+                self.probe_started_at = now
+            return True
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self.lock:
+            # a slow call that started before the circuit opened says
+            # nothing about the dependency now, so OPEN ignores it
+            if self.state != self.OPEN:
+                self.state = self.CLOSED
+                self.failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self._open()
+            elif self.state == self.CLOSED:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self._open()
+
+    def record_abort(self) -> None:
+        """For calls that were cancelled or interrupted before finishing."""
+        with self.lock:
+            # an unfinished probe, e.g. one timed out by asyncio.wait_for,
+            # counts as a failure; elsewhere cancellation says nothing
+            if self.state == self.HALF_OPEN:
+                self._open()
+
+
 class Retry:
     def __init__(
         self,
@@ -11,64 +157,144 @@ class Retry:
         backoff_factor: float = 2.0,
         exceptions=(Exception,),
         jitter: bool = True,
+        budget: RetryBudget = None,
+        circuit_breaker: CircuitBreaker = None,
     ):
         self.retries = retries
         self.delay = delay
         self.backoff_factor = backoff_factor
         self.exceptions = exceptions
         self.jitter = jitter
+        self.budget = budget
+        self.circuit_breaker = circuit_breaker
+
+    def _before_attempt(self, func, last_exception):
+        if self.circuit_breaker and not self.circuit_breaker.allow_request():
+            raise CircuitOpenError(
+                f"circuit for {func.__name__} is open"
+            ) from last_exception
+
+    def _after_failure(self, func, attempt, delay, exception):
+        """Returns the delay before the next attempt, or re-raises."""
+        if self.circuit_breaker:
+            self.circuit_breaker.record_failure()
+            # fail fast rather than sleep through a backoff first
+            if self.circuit_breaker.state == CircuitBreaker.OPEN:
+                raise CircuitOpenError(
+                    f"circuit for {func.__name__} is open"
+                ) from exception
+
+        if attempt == self.retries:
+            print(
+                f"Attempt {attempt + 1}/{self.retries + 1}: Failed after all retries. Raising exception."
+            )
+            raise exception  # Re-raise the last exception if all retries are exhausted
+
+        if self.budget and not self.budget.try_spend():
+            print(
+                f"Attempt {attempt + 1}/{self.retries + 1}: Retry budget exhausted. Raising exception."
+            )
+            raise exception
+
+        current_delay = delay
+        if self.jitter:
+            current_delay = current_delay * (1 + random.uniform(-0.1, 0.1))
+
+        print(
+            f"Attempt {attempt + 1}/{self.retries + 1}: {exception.__class__.__name__} caught. Retrying in {current_delay:.2f} seconds..."
+        )
+        return current_delay
+
+    def _after_success(self):
+        # also used for exceptions that are not retried: the dependency
+        # answered, and a half-open probe must not be left outstanding
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success()
+
+    def _after_abort(self):
+        if self.circuit_breaker:
+            self.circuit_breaker.record_abort()
 
     def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if self.budget:
+                    self.budget.record_request()
+                _delay = self.delay
+                last_exception = None
+                for i in range(self.retries + 1):
+                    self._before_attempt(func, last_exception)
+                    try:
+                        result = await func(*args, **kwargs)
+                    except self.exceptions as e:
+                        last_exception = e
+                        # awaiting keeps the event loop free while backing off
+                        await asyncio.sleep(self._after_failure(func, i, _delay, e))
+                        _delay *= self.backoff_factor
+                    except Exception:
+                        self._after_success()
+                        raise
+                    except BaseException:
+                        # cancelled, e.g. by asyncio.wait_for
+                        self._after_abort()
+                        raise
+                    else:
+                        self._after_success()
+                        return result
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
+            if self.budget:
+                self.budget.record_request()
             _delay = self.delay
+            last_exception = None
             for i in range(self.retries + 1):
+                self._before_attempt(func, last_exception)
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except self.exceptions as e:
-                    if i == self.retries:
-                        print(
-                            f"Attempt {i + 1}/{self.retries + 1}: Failed after all retries. Raising exception."
-                        )
-                        raise  # Re-raise the last exception if all retries are exhausted
-
-                    current_delay = _delay
-                    if self.jitter:
-                        current_delay = current_delay * (1 + random.uniform(-0.1, 0.1))
-
-                    print(
-                        f"Attempt {i + 1}/{self.retries + 1}: {e.__class__.__name__} caught. Retrying in {current_delay:.2f} seconds..."
-                    )
-                    time.sleep(current_delay)
+                    last_exception = e
+                    time.sleep(self._after_failure(func, i, _delay, e))
                     _delay *= self.backoff_factor  # increase delay for next attempt
-
-            return func(*args, **kwargs)
+                except Exception:
+                    self._after_success()
+                    raise
+                except BaseException:
+                    self._after_abort()
+                    raise
+                else:
+                    self._after_success()
+                    return result
 
         return wrapper
 
 
-import requests
-
-# Simulate a flaky network call
-call_count = 0
-
-
-@Retry(
-    retries=4,
-    delay=0.5,
-    backoff_factor=2,
-    exceptions=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
-    jitter=True,
-)
-def make_api_call(url):
-    global call_count
-    call_count += 1
-    print(f"Making API call to {url} (Attempt {call_count})...")
-    if call_count < 3:  # Simulate failure for the first 2 calls
-        raise requests.exceptions.ConnectionError("Simulated network issue")
-    elif call_count == 3:  # Simulate success on the 3rd call
-        print("API call successful!")
-        return {"status": "success", "data": "Hello from API"}
-    else:  # Subsequent calls also succeed
-        print("API call successful (subsequent).")
-        return {"status": "success", "data": "Hello from API"}
+if __name__ == "__main__":
+    import requests
+
+    # Simulate a flaky network call
+    call_count = 0
+
+    @Retry(
+        retries=4,
+        delay=0.5,
+        backoff_factor=2,
+        exceptions=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        jitter=True,
+    )
+    def make_api_call(url):
+        global call_count
+        call_count += 1
+        print(f"Making API call to {url} (Attempt {call_count})...")
+        if call_count < 3:  # Simulate failure for the first 2 calls
+            raise requests.exceptions.ConnectionError("Simulated network issue")
+        elif call_count == 3:  # Simulate success on the 3rd call
+            print("API call successful!")
+            return {"status": "success", "data": "Hello from API"}
+        else:  # Subsequent calls also succeed
+            print("API call successful (subsequent).")
+            return {"status": "success", "data": "Hello from API"}